@@ -42,8 +42,8 @@ def run(ctx: click.Context, model_dir: Path, model_name: ModelEnum, categories:
     Subcommand to collect model-related commands and run operations on them.
 
     The model dir is expected to be a directory with model files, and the categories are
-    expected to be in JSON format. The categories file should contain a mapping of categorical
-    features to their possible values.
+    expected to be in MessagePack (.msgpack) or JSON format. The categories file should contain
+    a mapping of categorical features to their possible values.
 
     The response of the model is a single integer representing the predicted build time duration
     in minutes by default. If the model does not recognize the package, it will return -1 as
@@ -1,12 +1,31 @@
+import importlib.util
+import json
 import logging
-import math
+import os
+import pickle
 from pathlib import Path
+from typing import Any
 
 import joblib
+import msgpack
+
+try:
+    # orjson parses several times faster than stdlib json, but it is optional
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
 
+def _get_joblib_compression() -> tuple[str, int]:
+    # lz4 is much faster than zlib, but it is an optional dependency of joblib
+    if importlib.util.find_spec("lz4") is None:
+        return "zlib", 3
+
+    return "lz4", 3
+
+
 def save_joblib(obj: object, result_dir: Path, filename: str) -> Path:
     """
     Save an object to a file using joblib.
@@ -19,22 +38,75 @@ def save_joblib(obj: object, result_dir: Path, filename: str) -> Path:
     Returns:
         The path to the saved file
     """
-    if not result_dir.is_dir():
-        raise ValueError(f"{result_dir} is not a directory")
-
-    if not result_dir.exists():
-        logger.debug("Creating directory: %s", result_dir)
-        result_dir.mkdir(parents=True, exist_ok=True)
+    result_dir.mkdir(parents=True, exist_ok=True)
 
     path = result_dir / f"{filename}.joblib"
     if path.exists():
         raise ValueError(f"File {path} already exists, won't overwrite it")
 
-    joblib.dump(obj, path)
+    # dump to a temporary file and atomically move it in place, so a crash in the middle
+    # of the dump never leaves a partially written file behind
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    try:
+        joblib.dump(
+            obj,
+            tmp_path,
+            compress=_get_joblib_compression(),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
     logger.info("Saved %s to %s", obj.__class__.__name__, path)
     return path
 
 
+def load_json(path: Path) -> Any:
+    """
+    Load a JSON file, using orjson if it is available.
+
+    Args:
+        path: The path to the JSON file
+
+    Returns:
+        The deserialized JSON content
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def load_msgpack(path: Path) -> Any:
+    """
+    Load a MessagePack file.
+
+    Args:
+        path: The path to the MessagePack file
+
+    Returns:
+        The deserialized MessagePack content
+    """
+    with open(path, "rb") as f:
+        return msgpack.unpackb(f.read(), raw=False)
+
+
+def save_msgpack(obj: Any, path: Path) -> None:
+    """
+    Save an object to a MessagePack file.
+
+    Args:
+        obj: The object to save
+        path: The path to the MessagePack file
+    """
+    with open(path, "wb") as f:
+        f.write(msgpack.packb(obj, use_bin_type=True))
+
+
 def to_minutes_rounded(seconds: int) -> int:
     """
     Convert seconds to minutes, rounding up.
@@ -45,4 +117,5 @@ def to_minutes_rounded(seconds: int) -> int:
     Returns:
         The time in minutes, rounded up
     """
-    return math.ceil(seconds / 60)
+    # ceil division on integers, avoids the float round trip of math.ceil(seconds / 60)
+    return -(-seconds // 60)
@@ -1,16 +1,27 @@
-import json
 import logging
 from pathlib import Path
+from typing import TypeVar
 
+import numpy as np
 from sklearn.compose import TransformedTargetRegressor
 
 from rpmeta.config import Config, ModelBehavior
 from rpmeta.constants import ModelEnum, TimeFormat
-from rpmeta.dataset import InputRecord
+from rpmeta.dataset import InputRecord, get_category_dtypes, records_to_data_frame
+from rpmeta.helpers import load_json, load_msgpack
 from rpmeta.model import Model, get_all_models
 
 logger = logging.getLogger(__name__)
 
+_MinutesT = TypeVar("_MinutesT", int, np.ndarray)
+
+# (factor, is_division) to convert predicted minutes to the requested time format
+_TIME_SCALE: dict[TimeFormat, tuple[int, bool]] = {
+    TimeFormat.SECONDS: (60, False),
+    TimeFormat.MINUTES: (1, False),
+    TimeFormat.HOURS: (60, True),
+}
+
 
 class Predictor:
     def __init__(
@@ -23,6 +34,9 @@ class Predictor:
         self.category_maps = category_maps
         self.config = config
 
+        self._known_packages = frozenset(category_maps.get("package_name", ()))
+        self._category_dtypes = get_category_dtypes(category_maps)
+
     @staticmethod
     def _model_factory(model_name: ModelEnum) -> Model:
         for model in get_all_models():
@@ -56,11 +70,28 @@ class Predictor:
         model = cls._model_factory(model_name).load_regressor(model_path)
 
         logger.info("Loading category maps from %s", category_maps_path)
-        with open(category_maps_path) as f:
-            category_maps = json.load(f)
-
+        category_maps = cls._load_category_maps(category_maps_path)
         return cls(model, category_maps, config)
 
+    @staticmethod
+    def _load_category_maps(path: Path) -> dict[str, list[str]]:
+        # older versions produced JSON category maps, and the suffix can't be trusted as the
+        # maps may be copied to a location with a fixed name
+        loaders = [load_msgpack, load_json]
+        if path.suffix != ".msgpack":
+            loaders.reverse()
+
+        try:
+            return loaders[0](path)
+        except ValueError:
+            logger.debug(
+                "Failed to load %s with %s, trying %s",
+                path,
+                loaders[0].__name__,
+                loaders[1].__name__,
+            )
+            return loaders[1](path)
+
     def predict(self, input_data: InputRecord, behavior: ModelBehavior) -> int:
         """
         Make prediction on the input data using the model and category maps.
@@ -72,25 +103,71 @@ class Predictor:
         Returns:
             The prediction time in minutes by default
         """
-        if input_data.package_name not in self.category_maps["package_name"]:
+        if input_data.package_name not in self._known_packages:
             logger.error(
                 f"Package name {input_data.package_name} is not known. "
                 "Please retrain the model with the new package name.",
             )
             return -1
 
-        df = input_data.to_data_frame(self.category_maps)
+        df = input_data.to_data_frame(self.category_maps, self._category_dtypes)
         pred = self.model.predict(df)
         minutes = int(pred[0].item())
+        return self._to_time_format(minutes, behavior)
 
-        if behavior.time_format == TimeFormat.SECONDS:
-            return minutes * 60
-        if behavior.time_format == TimeFormat.MINUTES:
-            return minutes
-        if behavior.time_format == TimeFormat.HOURS:
-            return minutes // 60
+    def predict_batch(
+        self,
+        input_data: list[InputRecord],
+        behavior: ModelBehavior,
+    ) -> list[int]:
+        """
+        Make predictions on multiple input records at once, running the model only once.
+
+        Args:
+            input_data: The input records to make predictions on
+            behavior: The model behavior configuration
 
-        logger.error(
-            f"Unknown time format {behavior.time_format}. Returning minutes as default.",
+        Returns:
+            The prediction times in minutes by default, in the same order as the input
+            records. Unknown packages get -1 as a prediction.
+        """
+        known_mask = np.fromiter(
+            (record.package_name in self._known_packages for record in input_data),
+            dtype=bool,
+            count=len(input_data),
         )
-        return minutes
+        predictions = np.full(len(input_data), -1, dtype=np.int64)
+
+        unknown = [
+            record.package_name
+            for record, known in zip(input_data, known_mask, strict=True)
+            if not known
+        ]
+        if unknown:
+            logger.error(
+                f"Package names {unknown} are not known. "
+                "Please retrain the model with the new package names.",
+            )
+
+        if not known_mask.any():
+            return predictions.tolist()
+
+        known_records = [
+            record for record, known in zip(input_data, known_mask, strict=True) if known
+        ]
+        df = records_to_data_frame(known_records, self.category_maps, self._category_dtypes)
+        minutes = self.model.predict(df).astype(np.int64)
+        predictions[known_mask] = self._to_time_format(minutes, behavior)
+        return predictions.tolist()
+
+    @staticmethod
+    def _to_time_format(minutes: _MinutesT, behavior: ModelBehavior) -> _MinutesT:
+        scale = _TIME_SCALE.get(behavior.time_format)
+        if scale is None:
+            logger.error(
+                f"Unknown time format {behavior.time_format}. Returning minutes as default.",
+            )
+            return minutes
+
+        factor, is_division = scale
+        return minutes // factor if is_division else minutes * factor
@@ -1,4 +1,3 @@
-import json
 import logging
 import time
 from pathlib import Path
@@ -11,6 +10,7 @@ from sklearn.model_selection import train_test_split
 
 from rpmeta.config import Config
 from rpmeta.constants import ALL_FEATURES, CATEGORICAL_FEATURES, DIVIDER, TARGET, ModelEnum
+from rpmeta.helpers import save_msgpack
 from rpmeta.trainer.base import BestModelResult, ModelTrainer, TrialResult
 from rpmeta.trainer.models import get_all_model_trainers
 
@@ -31,12 +31,10 @@ class ModelTrainingManager:
 
         category_dtypes = self._categorize_get_categories_mapping()
         category_dtypes_path = (
-            Path(self.config.result_dir) / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+            Path(self.config.result_dir) / f"{time.strftime('%Y%m%d-%H%M%S')}.msgpack"
         )
 
-        with category_dtypes_path.open("w") as f:
-            json.dump(category_dtypes, f, indent=4)
-
+        save_msgpack(category_dtypes, category_dtypes_path)
         logger.info(f"Saved category dtypes to {category_dtypes_path}")
 
         self.X = self.df[ALL_FEATURES]
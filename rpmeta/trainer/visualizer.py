@@ -4,22 +4,275 @@ import os
 import tempfile
 import time
 import tracemalloc
+from collections.abc import Callable
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 import joblib
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 import optuna.visualization as vis
 import pandas as pd
 import seaborn as sn
+from matplotlib.figure import Figure
 from optuna import Study
+from optuna.importance import BaseImportanceEvaluator, get_param_importances
+from optuna.trial import FrozenTrial
 
 from rpmeta.config import Config
 from rpmeta.trainer.base import BestModelResult, TrialResult
 
 logger = logging.getLogger(__name__)
 
+# plots are only saved to files, no need for an interactive backend
+matplotlib.use("Agg")
+
+# rendering cost grows linearly with the number of points, while the plot looks the same
+MAX_PLOT_POINTS = 20000
+
+
+def _downsample(*arrays: np.ndarray, n: int = MAX_PLOT_POINTS) -> tuple[np.ndarray, ...]:
+    """
+    Randomly pick the same (at most) n items from all given arrays of equal length.
+    """
+    size = len(arrays[0])
+    if size <= n:
+        return arrays
+
+    rng = np.random.default_rng(0)
+    idx = np.sort(rng.choice(size, size=n, replace=False))
+    return tuple(np.asarray(array)[idx] for array in arrays)
+
+
+class _CachedImportanceEvaluator(BaseImportanceEvaluator):
+    """
+    Importance evaluator returning already computed importances, so optuna plots do not
+    evaluate them again from scratch.
+    """
+
+    def __init__(self, importances: dict[str, float]) -> None:
+        self._importances = importances
+
+    def evaluate(
+        self,
+        study: Study,
+        params: Optional[list[str]] = None,
+        *,
+        target: Optional[Callable[[FrozenTrial], float]] = None,
+    ) -> dict[str, float]:
+        if params is None:
+            return dict(self._importances)
+
+        return {param: self._importances[param] for param in params}
+
+
+def _save_figure(fig: Figure, plot_dir: Path, name: str) -> None:
+    path = plot_dir / f"{name}.png"
+    # layout is already handled by tight_layout in each plotter, bbox_inches="tight" would
+    # need an extra render pass; low PNG compression level is much faster to encode
+    fig.savefig(path, dpi=150, pil_kwargs={"optimize": False, "compress_level": 1})
+    logger.info("Saved figure %s.png to %s", name, plot_dir)
+
+
+def _format_parameter(value: Any) -> Any:
+    if isinstance(value, float):
+        if value.is_integer():
+            return int(value)
+        return round(value, 4)
+    return value
+
+
+def _prepare_best_params(best_row: pd.Series) -> dict[str, Any]:
+    best_params = {k: v for k, v in best_row.items() if k not in {"model_name"}}
+
+    if "params" in best_params and isinstance(best_params["params"], dict):
+        params_dict = best_params.pop("params")
+        best_params.update(params_dict)
+
+    exclude_keys = {"trial", "trial_number", "model"}
+    return {k: _format_parameter(v) for k, v in best_params.items() if k not in exclude_keys}
+
+
+def _plot_trials(model_name: str, results: list[TrialResult], plot_dir: Path) -> None:
+    results_df = pd.DataFrame(results)
+    results_df = results_df.sort_values("test_score").reset_index(drop=True)
+    results_df["trial_number"] = results_df.index
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    sn.scatterplot(
+        data=results_df,
+        x="trial_number",
+        y="test_score",
+        hue="fit_time",
+        palette="mako",
+        ax=ax,
+    )
+
+    best_row = results_df.iloc[-1]
+    best_score = best_row["test_score"]
+    best_index = best_row["trial_number"]
+    best_params = _prepare_best_params(best_row)
+
+    ax.set_title(
+        f"Model performance: {model_name}\n"
+        f"Best neg. RMSE: {best_score:.3f} | "
+        f"Configurations tried: {len(results_df)}",
+    )
+
+    ax.set_xlabel("Configuration index (sorted by negative RMSE)")
+    ax.set_ylabel("Negative RMSE (higher is better)")
+    ax.legend(title="Fit time")
+    ax.grid(True, linestyle="--")
+
+    text_params = "\n".join(
+        [f"{key}: {value}" for key, value in best_params.items()],
+    )
+    if text_params:
+        ax.annotate(
+            text_params,
+            xy=(best_index, best_score),
+            xytext=(1.05, 0.95),
+            textcoords="axes fraction",
+            ha="left",
+            va="top",
+            fontsize=9,
+            bbox=dict(boxstyle="round,pad=0.6", fc="lightyellow", ec="gray"),
+            arrowprops=dict(
+                arrowstyle="->",
+                connectionstyle="arc3,rad=0.2",
+                color="gray",
+            ),
+        )
+
+    fig.tight_layout()
+    _save_figure(fig, plot_dir, f"{model_name}_performance")
+    plt.close(fig)
+
+
+def _plot_predictions(
+    model_name: str,
+    y_test_np: np.ndarray,
+    y_test_log: np.ndarray,
+    y_pred_np: np.ndarray,
+    plot_dir: Path,
+) -> None:
+    valid_mask_positive_nums = (
+        np.isfinite(y_test_np) & np.isfinite(y_pred_np) & (y_test_np >= 0) & (y_pred_np >= 0)
+    )
+    mask_5k = (y_test_np <= 5000) & (y_pred_np <= 5000)
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    for suffix, y_test_f, y_pred_f, title in [
+        ("", y_test_np, y_pred_np, f"{model_name} Prediction vs. Reality"),
+        (
+            "_5k",
+            y_test_np[mask_5k],
+            y_pred_np[mask_5k],
+            f"{model_name} Prediction vs. Reality (5k)",
+        ),
+        (
+            "_log_scale",
+            y_test_log[valid_mask_positive_nums],
+            np.log1p(y_pred_np[valid_mask_positive_nums]),
+            f"{model_name} Prediction vs. Reality (log-scale)",
+        ),
+    ]:
+        ax.clear()
+        ax.scatter(
+            *_downsample(y_test_f, y_pred_f),
+            alpha=0.3,
+            s=15,
+            color="royalblue",
+            edgecolor="black",
+            linewidth=0.3,
+            rasterized=True,
+        )
+
+        ax.plot(
+            [y_test_f.min(), y_test_f.max()],
+            [y_test_f.min(), y_test_f.max()],
+            "k--",
+        )
+        ax.set_title(title)
+        ax.set_xlabel("Real build_duration")
+        ax.set_ylabel("Predicted build_duration")
+        ax.grid(True, linestyle="--")
+        fig.tight_layout()
+
+        _save_figure(fig, plot_dir, f"{model_name}_pred_vs_real{suffix}")
+
+    plt.close(fig)
+
+
+def _generate_optuna_plot(study, plot_func, optuna_dir, model_name, plot_name, **kwargs):
+    fig = plot_func(study, **kwargs)
+    fig.write_image(f"{optuna_dir}/{model_name}_{plot_name}.png", scale=2)
+    fig.write_html(f"{optuna_dir}/{model_name}_{plot_name}.html")
+
+
+def _plot_optuna(model_name: str, study: Study, optuna_dir: Path) -> None:
+    try:
+        logger.info("Generating Optuna plots for model: %s", model_name)
+
+        # Optimization history
+        _generate_optuna_plot(
+            study,
+            vis.plot_optimization_history,
+            optuna_dir,
+            model_name,
+            "opt_history",
+            target_name="RMSE",
+        )
+
+        # Param importances
+        importances = get_param_importances(study)
+        _generate_optuna_plot(
+            study,
+            vis.plot_param_importances,
+            optuna_dir,
+            model_name,
+            "param_importance",
+            evaluator=_CachedImportanceEvaluator(importances),
+        )
+
+        # Parallel coordinates
+        _generate_optuna_plot(
+            study,
+            vis.plot_parallel_coordinate,
+            optuna_dir,
+            model_name,
+            "parallel",
+        )
+
+        # Slice plot
+        _generate_optuna_plot(
+            study,
+            vis.plot_slice,
+            optuna_dir,
+            model_name,
+            "slice",
+            target_name="RMSE",
+        )
+
+        # Contour plot of the two most important params
+        top_params = list(importances)[:2]
+        if len(top_params) >= 2:
+            _generate_optuna_plot(
+                study,
+                vis.plot_contour,
+                optuna_dir,
+                model_name,
+                "contour",
+                params=top_params,
+            )
+
+        # EDF plot
+        _generate_optuna_plot(study, vis.plot_edf, optuna_dir, model_name, "edf")
+
+    except Exception as e:
+        logger.error("Error generating Optuna plots for model %s: %s", model_name, str(e))
+
 
 class ResultsHandler:
     def __init__(
@@ -36,6 +289,9 @@ class ResultsHandler:
         self.studies = studies
         self.X_test = X_test
         self.y_test = y_test
+        self._y_test_np = np.ascontiguousarray(self.y_test.to_numpy(), dtype=np.float32)
+        self._y_test_log = np.log1p(np.clip(self._y_test_np, 0, None))
+        self._cached_preds: Optional[dict[str, np.ndarray]] = None
 
         self.config = config
         self._tune_dir = self.config.result_dir / "hyperparameter_tuning"
@@ -47,164 +303,73 @@ class ResultsHandler:
         self._plot_dir.mkdir(parents=True, exist_ok=True)
         self._data_dir.mkdir(parents=True, exist_ok=True)
 
-        self._set_plot_style()
-
-    def _set_plot_style(self) -> None:
         sn.set_theme(style="darkgrid")
-        plt.grid(axis="y", linestyle="dotted")
-        plt.grid(axis="x", linestyle="dotted")
-
-    def _save_figure(self, fig: plt.Figure, name: str) -> None:
-        path = self._plot_dir / f"{name}.png"
-        fig.savefig(path, dpi=300, bbox_inches="tight")
-        plt.close()
-        logger.info("Saved figure %s.png to %s", name, self._plot_dir)
-
-    def _format_parameter(self, value: Any) -> Any:
-        if isinstance(value, float):
-            if value.is_integer():
-                return int(value)
-            return round(value, 4)
-        return value
-
-    def _prepare_best_params(self, best_row: pd.Series) -> dict[str, Any]:
-        best_params = {k: v for k, v in best_row.items() if k not in {"model_name"}}
-
-        if "params" in best_params and isinstance(best_params["params"], dict):
-            params_dict = best_params.pop("params")
-            best_params.update(params_dict)
-
-        exclude_keys = {"trial", "trial_number", "model"}
-        return {
-            k: self._format_parameter(v) for k, v in best_params.items() if k not in exclude_keys
-        }
-
-    def plot_trials(self) -> None:
-        for model_name, results in self.all_trials.items():
-            results_df = pd.DataFrame(results)
-            results_df = results_df.sort_values("test_score").reset_index(drop=True)
-            results_df["trial_number"] = results_df.index
-
-            plt.figure(figsize=(12, 7))
-            sn.scatterplot(
-                data=results_df,
-                x="trial_number",
-                y="test_score",
-                hue="fit_time",
-                palette="mako",
-            )
+        self._fig, self._ax = plt.subplots(figsize=(12, 7))
+
+    @property
+    def _preds(self) -> dict[str, np.ndarray]:
+        # predicted lazily, so the performance measurement runs before any cached inference
+        if self._cached_preds is None:
+            self._cached_preds = {
+                model_name: best.model.predict(self.X_test)
+                for model_name, best in self.bests.items()
+            }
 
-            best_row = results_df.iloc[-1]
-            best_score = best_row["test_score"]
-            best_index = best_row["trial_number"]
-            best_params = self._prepare_best_params(best_row)
+        return self._cached_preds
 
-            plt.title(
-                f"Model performance: {model_name}\n"
-                f"Best neg. RMSE: {best_score:.3f} | "
-                f"Configurations tried: {len(results_df)}",
-            )
+    def _reset_axes(self, figsize: tuple[float, float]) -> plt.Axes:
+        self._ax.clear()
+        self._fig.set_size_inches(figsize)
+        return self._ax
 
-            plt.xlabel("Configuration index (sorted by negative RMSE)")
-            plt.ylabel("Negative RMSE (higher is better)")
-            plt.legend(title="Fit time")
-            plt.grid(True, linestyle="--")
+    def _save_figure(self, name: str) -> None:
+        _save_figure(self._fig, self._plot_dir, name)
 
-            text_params = "\n".join(
-                [f"{key}: {value}" for key, value in best_params.items()],
-            )
-            if text_params:
-                plt.annotate(
-                    text_params,
-                    xy=(best_index, best_score),
-                    xytext=(1.05, 0.95),
-                    textcoords="axes fraction",
-                    ha="left",
-                    va="top",
-                    fontsize=9,
-                    bbox=dict(boxstyle="round,pad=0.6", fc="lightyellow", ec="gray"),
-                    arrowprops=dict(
-                        arrowstyle="->",
-                        connectionstyle="arc3,rad=0.2",
-                        color="gray",
-                    ),
-                )
+    def _save_data_frame(self, df: pd.DataFrame, name: str) -> None:
+        df.to_parquet(
+            self._data_dir / f"{name}.parquet",
+            engine="pyarrow",
+            compression="zstd",
+            index=False,
+        )
 
-            self._save_figure(plt, f"{model_name}_performance")
+    def plot_trials(self) -> None:
+        for model_name, results in self.all_trials.items():
+            _plot_trials(model_name, results, self._plot_dir)
 
     def print_trials_table(self):
-        for _, results in self.all_trials.items():
-            results_df = pd.DataFrame(results)
-            results_df = results_df.sort_values(
-                "test_score",
-                ascending=False,
-            ).reset_index(drop=True)
-            print(f"\n{results_df}")
+        for model_name, results in self.all_trials.items():
+            rows = sorted(results, key=lambda r: r.test_score, reverse=True)
+            print(f"\n{model_name}:")
+            print(f"{'':>5} {'trial':>6} {'test_score':>12} {'fit_time':>9}  params")
+            for i, row in enumerate(rows):
+                print(
+                    f"{i:>5} {row.trial_number:>6} {row.test_score:>12.4f} "
+                    f"{row.fit_time:>9}  {row.params}",
+                )
 
     def plot_predictions(self):
-        for model_name, best in self.bests.items():
-            y_pred = best.model.predict(self.X_test)
-
-            y_test_np = np.array(self.y_test)
-            y_pred_np = np.array(y_pred)
-
-            valid_mask_positive_nums = (
-                ~np.isnan(y_test_np) & ~np.isnan(y_pred_np) & (y_test_np >= 0) & (y_pred_np >= 0)
+        for model_name, y_pred in self._preds.items():
+            _plot_predictions(
+                model_name,
+                self._y_test_np,
+                self._y_test_log,
+                np.asarray(y_pred, dtype=np.float32),
+                self._plot_dir,
             )
 
-            mask_5k = (self.y_test <= 5000) & (y_pred <= 5000)
-
-            for suffix, y_test_f, y_pred_f, title in [
-                ("", self.y_test, y_pred, f"{model_name} Prediction vs. Reality"),
-                (
-                    "_5k",
-                    self.y_test[mask_5k],
-                    y_pred[mask_5k],
-                    f"{model_name} Prediction vs. Reality (5k)",
-                ),
-                (
-                    "_log_scale",
-                    np.log1p(y_test_np[valid_mask_positive_nums]),
-                    np.log1p(y_pred_np[valid_mask_positive_nums]),
-                    f"{model_name} Prediction vs. Reality (log-scale)",
-                ),
-            ]:
-                plt.figure(figsize=(8, 6))
-                plt.scatter(
-                    y_test_f,
-                    y_pred_f,
-                    alpha=0.3,
-                    s=15,
-                    color="royalblue",
-                    edgecolor="black",
-                    linewidth=0.3,
-                )
-
-                plt.plot(
-                    [y_test_f.min(), y_test_f.max()],
-                    [y_test_f.min(), y_test_f.max()],
-                    "k--",
-                )
-                plt.title(title)
-                plt.xlabel("Real build_duration")
-                plt.ylabel("Predicted build_duration")
-                plt.grid(True, linestyle="--")
-                plt.tight_layout()
-
-                self._save_figure(plt, f"{model_name}_pred_vs_real{suffix}")
-
     def plot_test_value_compare(self):
         best_df = pd.DataFrame.from_dict(self.bests, orient="index")
 
-        plt.figure(figsize=(10, 6))
-        sn.barplot(data=best_df, x="model_name", y="neg_rmse", color="royalblue")
+        ax = self._reset_axes((10, 6))
+        sn.barplot(data=best_df, x="model_name", y="neg_rmse", color="royalblue", ax=ax)
 
-        plt.title("Comparison of the best models by negative RMSE")
-        plt.ylabel("Negative RMSE")
-        plt.xlabel("Model")
-        plt.tight_layout()
+        ax.set_title("Comparison of the best models by negative RMSE")
+        ax.set_ylabel("Negative RMSE")
+        ax.set_xlabel("Model")
+        self._fig.tight_layout()
 
-        self._save_figure(plt, "model_test_metric_comparison")
+        self._save_figure("model_test_metric_comparison")
 
     def save_best_json(self):
         out = {
@@ -220,36 +385,32 @@ class ResultsHandler:
             json.dump(out, f, indent=4)
 
     def plot_distribution(self):
-        plt.figure(figsize=(12, 6))
-        y_test_log = np.log1p(self.y_test)
-        for model_name, best_model in self.bests.items():
-            y_pred = best_model.model.predict(self.X_test)
-
-            y_pred = np.array(y_pred)
+        ax = self._reset_axes((12, 6))
+        for model_name, y_pred in self._preds.items():
+            y_pred = np.asarray(y_pred)
             valid_mask = (y_pred >= 0) & ~np.isnan(y_pred)
             y_pred_log = np.log1p(y_pred[valid_mask])
 
-            sn.kdeplot(y_pred_log, label=model_name)
+            (y_pred_log,) = _downsample(y_pred_log)
+            sn.kdeplot(y_pred_log, label=model_name, ax=ax)
 
-        sn.kdeplot(y_test_log, label="Reality", linestyle="--", color="black")
+        (y_test_log,) = _downsample(self._y_test_log)
+        sn.kdeplot(y_test_log, label="Reality", linestyle="--", color="black", ax=ax)
 
-        plt.title("Distribution of predicted values vs. reality (log-scale)")
-        plt.xlabel("build_duration")
-        plt.grid(True, linestyle="--")
-        plt.legend()
-        plt.tight_layout()
-        self._save_figure(plt, "model_distribution_real_vs_predicted")
+        ax.set_title("Distribution of predicted values vs. reality (log-scale)")
+        ax.set_xlabel("build_duration")
+        ax.grid(True, linestyle="--")
+        ax.legend()
+        self._fig.tight_layout()
+        self._save_figure("model_distribution_real_vs_predicted")
 
-        dist_data = {"y_test": self.y_test}
-        for model_name, best_model in self.bests.items():
-            dist_data[model_name] = best_model.model.predict(self.X_test)
+        dist_data = {"y_test": self.y_test, **self._preds}
 
         df_dist = pd.DataFrame(dist_data)
-        path_to_save = self._data_dir / "distribution_data.csv"
-        df_dist.to_csv(path_to_save, index=False)
+        self._save_data_frame(df_dist, "distribution_data")
 
     def _plot_metric(self, title: str, data: dict, ylabel: str, name: str) -> None:
-        plt.figure(figsize=(9, 4))
+        ax = self._reset_axes((9, 4))
         plot_df = pd.DataFrame(
             {"Model": list(data.keys()), "Value": list(data.values())},
         )
@@ -261,14 +422,15 @@ class ResultsHandler:
             hue="Model",
             palette="mako",
             legend=False,
+            ax=ax,
         )
 
-        self._set_plot_style()
-        plt.ylabel(ylabel)
-        plt.title(title)
-        plt.grid(axis="y", linestyle="--", alpha=0.5)
-        plt.tight_layout()
-        self._save_figure(plt, name)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+        ax.grid(axis="x", linestyle="dotted")
+        ax.grid(axis="y", linestyle="--", alpha=0.5)
+        self._fig.tight_layout()
+        self._save_figure(name)
 
     def plot_model_performance(self, tempdir: Path):
         prediction_times = {}
@@ -283,24 +445,32 @@ class ResultsHandler:
                 joblib.dump(best_model.model, model_path)
                 model_file_sizes[model_name] = os.path.getsize(model_path) / 1024**2
 
-                # measure original model performance
-                tracemalloc.start()
+                # warm up lazy initialization (thread pools, page faults, ...) on a tiny
+                # slice, so the measured time reflects the steady state
+                best_model.model.predict(self.X_test.iloc[:8])
+
+                # measure original model performance; time and memory are measured in
+                # separate passes, as tracemalloc would slow down (and thus distort) the timing
                 start_time = time.perf_counter()
                 model_ref = best_model.model.predict(self.X_test)
                 end_time = time.perf_counter()
-                model_ref, peak = tracemalloc.get_traced_memory()
-                tracemalloc.stop()
-
                 prediction_times[model_name] = end_time - start_time
-                memory_usages[model_name] = peak / 1024**2
 
                 # clear reference to reduce memory usage
                 del model_ref
 
+                tracemalloc.start()
+                model_ref = best_model.model.predict(self.X_test)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                memory_usages[model_name] = peak / 1024**2
+                del model_ref
+
                 tracemalloc.start()
                 loaded_model = joblib.load(model_path)
                 model_ref = loaded_model.predict(self.X_test)
-                model_ref, peak_reload = tracemalloc.get_traced_memory()
+                _, peak_reload = tracemalloc.get_traced_memory()
                 tracemalloc.stop()
 
                 reload_memory_usages[model_name] = peak_reload / 1024**2
@@ -348,77 +518,23 @@ class ResultsHandler:
         with open(self._data_dir / "model_performance.json", "w") as f:
             json.dump(performance_data, f, indent=4)
 
-    def _generate_optuna_plot(self, study, plot_func, model_name, plot_name, **kwargs):
-        fig = plot_func(study, **kwargs)
-        fig.write_image(f"{self._optuna_dir}/{model_name}_{plot_name}.png", scale=2)
-        fig.write_html(f"{self._optuna_dir}/{model_name}_{plot_name}.html")
-
     def plot_optuna_plots(self):
         for model_name, study in self.studies.items():
-            try:
-                logger.info("Generating Optuna plots for model: %s", model_name)
-
-                # Optimization history
-                self._generate_optuna_plot(
-                    study,
-                    vis.plot_optimization_history,
-                    model_name,
-                    "opt_history",
-                    target_name="RMSE",
-                )
-
-                # Param importances
-                self._generate_optuna_plot(
-                    study,
-                    vis.plot_param_importances,
-                    model_name,
-                    "param_importance",
-                )
-
-                # Parallel coordinates
-                self._generate_optuna_plot(
-                    study,
-                    vis.plot_parallel_coordinate,
-                    model_name,
-                    "parallel",
-                )
-
-                # Slice plot
-                self._generate_optuna_plot(
-                    study,
-                    vis.plot_slice,
-                    model_name,
-                    "slice",
-                    target_name="RMSE",
-                )
-
-                # Contour plot
-                importances = study.best_trial.params.keys()
-                top_params = list(importances)[:2]
-                if len(top_params) >= 2:
-                    self._generate_optuna_plot(
-                        study,
-                        vis.plot_contour,
-                        model_name,
-                        "contour",
-                        params=top_params,
-                    )
-
-                # EDF plot
-                self._generate_optuna_plot(study, vis.plot_edf, model_name, "edf")
-
-            except Exception as e:
-                logger.error("Error generating Optuna plots for model %s: %s", model_name, str(e))
+            _plot_optuna(model_name, study, self._optuna_dir)
 
     def run_all(self):
         self.save_best_json()
         self.plot_trials()
         self.print_trials_table()
+        with tempfile.TemporaryDirectory() as tempdir:
+            self.plot_model_performance(Path(tempdir))
+
         self.plot_predictions()
         self.plot_test_value_compare()
         self.plot_distribution()
-        with tempfile.TemporaryDirectory() as tempdir:
-            self.plot_model_performance(Path(tempdir))
+
+        # all the regular plots are done, the optuna ones are drawn with plotly
+        plt.close(self._fig)
 
         # kaleido is required and it is not packaged in fedora
         try:
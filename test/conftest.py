@@ -34,11 +34,11 @@ def model_and_types(request, tmp_path_factory):
     )
     assert result.returncode == 0, result.stderr or result.stdout
 
-    cat_dtypes_files = list(result_dir.glob("*.json"))
+    cat_dtypes_files = list(result_dir.glob("*.msgpack"))
     assert len(cat_dtypes_files) == 1, "Category dtypes file not found"
     assert cat_dtypes_files[0].stat().st_size > 0, "Category dtypes file is empty"
-    assert cat_dtypes_files[0].read_text(), "Category dtypes file is empty"
-    assert cat_dtypes_files[0].suffix == ".json", "Category dtypes file is not a JSON file"
+    assert cat_dtypes_files[0].read_bytes(), "Category dtypes file is empty"
+    assert cat_dtypes_files[0].suffix == ".msgpack", "Category dtypes file is not a msgpack file"
 
     return Path(result.stdout.strip()), cat_dtypes_files[0], model_name
 
@@ -12,7 +12,7 @@ def test_train(model_and_types):
     assert trained_model_file.stat().st_size > 0, f"{model_name} model is empty"
     assert cat_dtypes_file.exists(), "Category dtypes file was not saved"
     assert cat_dtypes_file.stat().st_size > 0, "Category dtypes file is empty"
-    assert cat_dtypes_file.suffix == ".json", "Category dtypes file is not a JSON file"
+    assert cat_dtypes_file.suffix == ".msgpack", "Category dtypes file is not a msgpack file"
 
 
 def test_predict(model_and_types):
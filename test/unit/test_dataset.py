@@ -2,7 +2,8 @@ from pathlib import Path
 
 import pandas as pd
 
-from rpmeta.dataset import HwInfo, Record
+from rpmeta.constants import ALL_FEATURES
+from rpmeta.dataset import HwInfo, Record, get_category_dtypes
 
 
 def test_hwinfo_parse_from_lscpu():
@@ -99,3 +100,23 @@ def test_inputrecord_to_data_frame(input_record):
     # because of DIVIDER
     assert df.iloc[0]["hw_info.ram"] == 160
     assert df.iloc[0]["hw_info.swap"] == 80
+
+
+def test_inputrecord_to_data_frame_with_precomputed_dtypes(input_record):
+    category_maps = {
+        "package_name": ["other-package", "test-package"],
+        "version": ["1.0.0"],
+        "os": ["fedora"],
+        "os_family": ["fedora"],
+        "os_version": ["35"],
+        "os_arch": ["x86_64"],
+        "hw_info.cpu_model_name": ["silny procak"],
+        "hw_info.cpu_arch": ["x86_64"],
+        "hw_info.cpu_model": ["12"],
+    }
+    df = input_record.to_data_frame(category_maps, get_category_dtypes(category_maps))
+
+    assert list(df.columns) == ALL_FEATURES
+    assert df["package_name"].cat.categories.tolist() == ["other-package", "test-package"]
+    assert df["package_name"].cat.codes.iloc[0] == 1
+    pd.testing.assert_frame_equal(df, input_record.to_data_frame(category_maps))
@@ -0,0 +1,30 @@
+import joblib
+import pytest
+
+from rpmeta.helpers import save_joblib, to_minutes_rounded
+
+
+def test_save_joblib_creates_directory(tmp_path):
+    result_dir = tmp_path / "nested" / "dir"
+    path = save_joblib({"foo": [1, 2, 3]}, result_dir, "obj")
+
+    assert path == result_dir / "obj.joblib"
+    assert joblib.load(path) == {"foo": [1, 2, 3]}
+    # no leftovers from the atomic write
+    assert list(result_dir.iterdir()) == [path]
+
+
+def test_save_joblib_refuses_to_overwrite(tmp_path):
+    save_joblib({"foo": 1}, tmp_path, "obj")
+    with pytest.raises(ValueError, match="already exists"):
+        save_joblib({"foo": 2}, tmp_path, "obj")
+
+    assert joblib.load(tmp_path / "obj.joblib") == {"foo": 1}
+
+
+@pytest.mark.parametrize(
+    ("seconds", "minutes"),
+    [(0, 0), (1, 1), (59, 1), (60, 1), (61, 2), (3600, 60)],
+)
+def test_to_minutes_rounded(seconds, minutes):
+    assert to_minutes_rounded(seconds) == minutes
@@ -1,9 +1,14 @@
+import json
 from pathlib import Path
 from unittest.mock import MagicMock, mock_open, patch
 
 import numpy as np
 import pandas as pd
+import pytest
 
+from rpmeta.config import ModelBehavior
+from rpmeta.constants import TimeFormat
+from rpmeta.helpers import save_msgpack
 from rpmeta.predictor import Predictor
 
 
@@ -59,3 +64,108 @@ def test_predict_unknown_package_name_logs_and_returns_minus_one(caplog, example
 
     assert result == -1
     assert "is not known" in caplog.text
+
+
+@pytest.mark.parametrize(
+    ("time_format", "expected"),
+    [
+        (TimeFormat.SECONDS, 150 * 60),
+        (TimeFormat.MINUTES, 150),
+        (TimeFormat.HOURS, 2),
+    ],
+)
+def test_predict_time_format(example_config, time_format, expected):
+    category_maps = {"package_name": ["pkg1"]}
+    mock_input = MagicMock()
+    mock_input.package_name = "pkg1"
+    mock_model = MagicMock()
+    mock_model.predict.return_value = np.array([150])
+    predictor = Predictor(mock_model, category_maps, example_config)
+
+    result = predictor.predict(mock_input, ModelBehavior(time_format=time_format))
+    assert result == expected
+
+
+@patch("rpmeta.model.Model.load_regressor")
+def test_predictor_load_msgpack(mock_load_regressor, tmp_path, example_config):
+    category_maps = {"package_name": ["pkg1", "pkg2"], "feature": ["a", "b"]}
+    category_maps_path = tmp_path / "categories.msgpack"
+    save_msgpack(category_maps, category_maps_path)
+
+    predictor = Predictor.load(
+        model_path=Path("model_path"),
+        model_name="xgboost",
+        category_maps_path=category_maps_path,
+        config=example_config,
+    )
+    assert predictor.category_maps == category_maps
+
+
+@patch("rpmeta.model.Model.load_regressor")
+def test_predictor_load_json(mock_load_regressor, tmp_path, example_config):
+    category_maps = {"package_name": ["pkg1", "pkg2"], "feature": ["a", "b"]}
+    category_maps_path = tmp_path / "categories.json"
+    category_maps_path.write_text(json.dumps(category_maps))
+
+    predictor = Predictor.load(
+        model_path=Path("model_path"),
+        model_name="xgboost",
+        category_maps_path=category_maps_path,
+        config=example_config,
+    )
+    assert predictor.category_maps == category_maps
+
+
+@patch("rpmeta.model.Model.load_regressor")
+def test_predictor_load_msgpack_with_json_suffix(mock_load_regressor, tmp_path, example_config):
+    category_maps = {"package_name": ["pkg1", "pkg2"], "feature": ["a", "b"]}
+    category_maps_path = tmp_path / "categories.json"
+    save_msgpack(category_maps, category_maps_path)
+
+    predictor = Predictor.load(
+        model_path=Path("model_path"),
+        model_name="xgboost",
+        category_maps_path=category_maps_path,
+        config=example_config,
+    )
+    assert predictor.category_maps == category_maps
+
+
+def test_predict_batch(input_record, example_config, caplog):
+    category_maps = {"package_name": ["test-package"]}
+    unknown_record = input_record.model_copy(update={"package_name": "unknown"})
+    mock_model = MagicMock()
+    mock_model.predict.return_value = np.array([150.7, 30.2])
+    predictor = Predictor(mock_model, category_maps, example_config)
+
+    with caplog.at_level("ERROR"):
+        result = predictor.predict_batch(
+            [input_record, unknown_record, input_record],
+            ModelBehavior(time_format=TimeFormat.HOURS),
+        )
+
+    assert result == [2, -1, 0]
+    mock_model.predict.assert_called_once()
+    assert len(mock_model.predict.call_args.args[0]) == 2
+    assert "unknown" in caplog.text
+
+
+def test_predict_batch_empty(example_config):
+    mock_model = MagicMock()
+    predictor = Predictor(mock_model, {"package_name": ["pkg1"]}, example_config)
+
+    assert predictor.predict_batch([], example_config.model.behavior) == []
+    mock_model.predict.assert_not_called()
+
+
+def test_predict_batch_all_unknown(input_record, example_config):
+    mock_model = MagicMock()
+    predictor = Predictor(mock_model, {"package_name": ["pkg1"]}, example_config)
+
+    result = predictor.predict_batch(
+        [input_record, input_record.model_copy(update={"package_name": "unknown"})],
+        example_config.model.behavior,
+    )
+
+    assert result == [-1, -1]
+    mock_model.predict.assert_not_called()